@@ -0,0 +1,158 @@
+"""
+Static asset pipeline for the single-page front end.
+
+Each asset is minified (with rjsmin/rcssmin when installed), written to
+static/dist under a content-hashed name, and precompressed with gzip and,
+when the brotli package is installed, brotli. Hashed files are served from
+/assets with immutable cache headers, so browsers only download an asset
+again after its content changes.
+
+When the app starts it reuses the manifest in static/dist if its hashed files
+exist and are newer than their sources, and builds only otherwise; run
+`python assets.py` to build them ahead of time (e.g. for a read-only deployment).
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+
+from flask import request, send_from_directory, url_for
+
+ASSETS = ('js/app.js', 'css/style.css')
+DIST_DIR = 'dist'
+MANIFEST_FILE = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def minify(name, source):
+    """Minify JS/CSS source; returns it unchanged if the minifier isn't installed"""
+    try:
+        if name.endswith('.js'):
+            import rjsmin
+            return rjsmin.jsmin(source)
+        if name.endswith('.css'):
+            import rcssmin
+            return rcssmin.cssmin(source)
+    except ImportError:
+        pass
+    return source
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_asset(static_folder, name):
+    """Minify, hash and precompress one asset; returns its path relative to the dist directory"""
+    with open(os.path.join(static_folder, name), encoding='utf-8') as f:
+        content = minify(name, f.read()).encode('utf-8')
+
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    hashed_name = f"{stem}.{digest}{ext}"
+    path = os.path.join(static_folder, DIST_DIR, hashed_name)
+
+    # Same content means same name, so an existing file is already up to date
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+        try:
+            import brotli
+            _write_atomic(path + '.br', brotli.compress(content, quality=11))
+        except ImportError:
+            pass
+        _write_atomic(path, content)
+    return hashed_name
+
+
+def read_manifest(static_folder):
+    """Return the manifest in the dist directory, or None if there isn't a readable one"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def load_manifest(static_folder):
+    """Return the existing manifest if every asset's hashed file exists and is newer than its source, else None"""
+    manifest = read_manifest(static_folder)
+    if manifest is None:
+        return None
+    for name in ASSETS:
+        if name not in manifest:
+            return None
+        try:
+            built = os.path.getmtime(os.path.join(static_folder, DIST_DIR, manifest[name]))
+        except OSError:
+            return None
+        if built < os.path.getmtime(os.path.join(static_folder, name)):
+            return None
+    return manifest
+
+
+def build_assets(static_folder):
+    """Build every asset in ASSETS and write the manifest if it changed; returns {asset name: hashed name}"""
+    manifest = {name: build_asset(static_folder, name) for name in ASSETS}
+    if manifest != read_manifest(static_folder):
+        _write_atomic(os.path.join(static_folder, DIST_DIR, MANIFEST_FILE),
+                      json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def init_assets(app):
+    """Load (or build) assets and register the asset_url() template helper and /assets route on app"""
+    dist_folder = os.path.join(app.static_folder, DIST_DIR)
+    manifest = load_manifest(app.static_folder)
+    if manifest is None:
+        try:
+            manifest = build_assets(app.static_folder)
+        except OSError:
+            # Read-only static folder: serve whatever was built last, or the plain sources
+            manifest = read_manifest(app.static_folder) or {}
+    source_mtimes = {name: os.path.getmtime(os.path.join(app.static_folder, name)) for name in ASSETS}
+
+    def asset_url(name):
+        if name not in manifest:
+            return url_for('static', filename=name)
+        if app.debug:
+            # Pick up edits to the sources without restarting the dev server
+            mtime = os.path.getmtime(os.path.join(app.static_folder, name))
+            if mtime != source_mtimes[name]:
+                manifest[name] = build_asset(app.static_folder, name)
+                source_mtimes[name] = mtime
+        return url_for('hashed_asset', filename=manifest[name])
+
+    @app.context_processor
+    def inject_asset_url():
+        return {'asset_url': asset_url}
+
+    @app.route('/assets/<path:filename>')
+    def hashed_asset(filename):
+        """Serve a content-hashed asset, precompressed when the client accepts it"""
+        mimetype = mimetypes.guess_type(filename)[0]
+        served, encoding = filename, None
+        for candidate, ext in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.exists(os.path.join(dist_folder, filename + ext)):
+                served, encoding = filename + ext, candidate
+                break
+
+        response = send_from_directory(dist_folder, served, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+if __name__ == '__main__':
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for name, hashed_name in build_assets(static_folder).items():
+        print(f"{name} -> {DIST_DIR}/{hashed_name}")
+    sys.exit(0)
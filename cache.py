@@ -0,0 +1,264 @@
+"""
+Shared result cache for the stock analysis app.
+
+Every worker process on a host talks to the same backend, so a ticker fetched
+by one worker is a hit for all of them. The default backend is a SQLite file in
+WAL mode (no external service needed); a Redis-compatible client can be swapped
+in through the same interface.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+
+class CacheBackend:
+    """Interface every cache backend implements. Values must be JSON-serializable."""
+
+    # How long a fill lock is held at most, and how long other workers wait for its value
+    FILL_LOCK_TTL = 30
+    FILL_POLL_INTERVAL = 0.1
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """Store value under key for ttl seconds"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def acquire_fill_lock(self, key, ttl):
+        """Try to become the only process computing key; the lock expires after ttl seconds"""
+        return True
+
+    def release_fill_lock(self, key):
+        pass
+
+    def get_or_set(self, key, ttl, compute, should_cache=None):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Concurrent misses across workers are coalesced: one worker holds a fill lock
+        and computes, the others poll for its result instead of calling compute().
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        deadline = time.monotonic() + self.FILL_LOCK_TTL
+        while True:
+            if self.acquire_fill_lock(key, self.FILL_LOCK_TTL):
+                try:
+                    # Another worker may have filled the key just before we took the lock
+                    value = self.get(key)
+                    if value is not None:
+                        return value
+                    value = compute()
+                    if should_cache is None or should_cache(value):
+                        self.set(key, value, ttl)
+                    return value
+                finally:
+                    self.release_fill_lock(key)
+
+            if time.monotonic() >= deadline:
+                # The lock holder is stuck; don't block the request any longer
+                return compute()
+            time.sleep(self.FILL_POLL_INTERVAL)
+            value = self.get(key)
+            if value is not None:
+                return value
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (caching disabled)"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cross-process cache stored in a single SQLite database in WAL mode.
+
+    WAL lets many readers proceed while one worker writes, and each set() is a
+    single INSERT OR REPLACE inside its own transaction, so readers never see a
+    partially written entry. Expired rows are ignored on read and purged
+    opportunistically on write.
+    """
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fill_locks ('
+                'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value, default=str), now + ttl)
+            )
+            if now - self._last_purge > self.PURGE_INTERVAL:
+                conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+                self._last_purge = now
+
+    def delete(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM cache')
+            conn.execute('DELETE FROM fill_locks')
+
+    def _lock_owner(self):
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def acquire_fill_lock(self, key, ttl):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            # A lock left behind by a crashed worker stops counting once it expires
+            conn.execute('DELETE FROM fill_locks WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO fill_locks (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, self._lock_owner(), now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def release_fill_lock(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM fill_locks WHERE key = ? AND owner = ?', (key, self._lock_owner()))
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend for Redis or any client exposing get/set(ex=, nx=)/delete/eval/scan_iter,
+    e.g. a local Redis stand-in such as fakeredis or KeyDB.
+    """
+
+    # Delete the lock only if it still holds our token, in one atomic step
+    RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, client, prefix='stock-analysis:'):
+        self.client = client
+        self.prefix = prefix
+        # Token of each fill lock held by the current thread, keyed by cache key
+        self._local = threading.local()
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, value, ttl):
+        # SET with EX is atomic: the value and its expiry are written together
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def _lock_tokens(self):
+        tokens = getattr(self._local, 'tokens', None)
+        if tokens is None:
+            tokens = self._local.tokens = {}
+        return tokens
+
+    def acquire_fill_lock(self, key, ttl):
+        # SET NX EX takes the lock and sets its expiry in one step. The token is unique
+        # so a lock that expired and was taken by another worker is never released by us.
+        token = uuid.uuid4().hex
+        if not self.client.set(self.prefix + 'lock:' + key, token, nx=True, ex=max(1, int(ttl))):
+            return False
+        self._lock_tokens()[key] = token
+        return True
+
+    def release_fill_lock(self, key):
+        token = self._lock_tokens().pop(key, None)
+        if token is not None:
+            self.client.eval(self.RELEASE_LOCK_SCRIPT, 1, self.prefix + 'lock:' + key, token)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+def create_cache_from_env():
+    """
+    Build the cache backend selected by the STOCK_CACHE_BACKEND environment variable:
+    'sqlite' (default), 'redis' (uses REDIS_URL) or 'none'.
+    """
+    backend = os.environ.get('STOCK_CACHE_BACKEND', 'sqlite').lower()
+
+    if backend == 'none':
+        return NullCache()
+
+    if backend == 'redis':
+        import redis
+        client = redis.Redis.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+        return RedisCache(client)
+
+    if backend == 'sqlite':
+        path = os.environ.get('STOCK_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'stock_analysis_cache.db')
+        return SQLiteCache(path)
+
+    raise ValueError(f"Unknown STOCK_CACHE_BACKEND: {backend}")
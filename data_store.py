@@ -0,0 +1,298 @@
+"""
+Memory-compact, in-process store for per-ticker market data.
+
+Price history is kept as NumPy arrays over a date index shared between tickers,
+financial statements as dense metric x period matrices, and company info as a
+__slots__ record. The store evicts least recently used entries to stay within a
+configurable memory budget.
+"""
+import hashlib
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Many tickers trade on the same calendar, so identical date indexes are stored once
+_shared_indexes = weakref.WeakValueDictionary()
+_shared_indexes_lock = threading.Lock()
+
+
+def shared_index(values):
+    """Return a read-only datetime64 array equal to values, reusing an existing copy if one is resident"""
+    values = np.ascontiguousarray(values, dtype='datetime64[s]')
+    if len(values) == 0:
+        return values
+    key = (len(values), int(values[0].astype(np.int64)), int(values[-1].astype(np.int64)),
+           hashlib.blake2b(values.tobytes(), digest_size=16).digest())
+    with _shared_indexes_lock:
+        existing = _shared_indexes.get(key)
+        if existing is not None and np.array_equal(existing, values):
+            return existing
+        values.flags.writeable = False
+        _shared_indexes[key] = values
+        return values
+
+
+def _to_naive_index(index):
+    """Convert a (possibly tz-aware) DatetimeIndex to exchange-local wall-clock datetime64 values"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values
+
+
+class PriceHistory:
+    """OHLCV bars as column arrays over a shared date index"""
+
+    __slots__ = ('dates', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, dates, open, high, low, close, volume):
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build from a yfinance history() DataFrame"""
+        if df is None or df.empty:
+            empty = np.empty(0, dtype=np.float32)
+            return cls(np.empty(0, dtype='datetime64[s]'), empty, empty, empty,
+                       np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64))
+        return cls(
+            dates=shared_index(_to_naive_index(df.index)),
+            open=df['Open'].to_numpy(dtype=np.float32),
+            high=df['High'].to_numpy(dtype=np.float32),
+            low=df['Low'].to_numpy(dtype=np.float32),
+            # Close feeds moving averages and returns, so it keeps full precision
+            close=df['Close'].to_numpy(dtype=np.float64),
+            volume=df['Volume'].to_numpy(dtype=np.float64),
+        )
+
+    def __len__(self):
+        return len(self.close)
+
+    def date_strings(self, unit='D'):
+        """Dates formatted as ISO strings ('D' for YYYY-MM-DD, 'm' for minute resolution)"""
+        return np.datetime_as_string(self.dates, unit=unit).tolist()
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+
+class Statement:
+    """A financial statement as a dense metrics x periods matrix"""
+
+    __slots__ = ('metrics', 'periods', 'values')
+
+    def __init__(self, metrics, periods, values):
+        self.metrics = metrics
+        self.periods = periods
+        self.values = values
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build from a yfinance statement DataFrame (rows are metrics, columns are period end dates)"""
+        if df is None or df.empty:
+            return cls((), np.empty(0, dtype='datetime64[s]'), np.empty((0, 0), dtype=np.float64))
+        values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        return cls(
+            metrics=tuple(sys.intern(str(metric)) for metric in df.index),
+            periods=shared_index(_to_naive_index(df.columns)),
+            values=values,
+        )
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    def row(self, metric):
+        """Return the values for a metric across all periods, or None if the statement lacks it"""
+        try:
+            return self.values[self.metrics.index(metric)]
+        except ValueError:
+            return None
+
+    def to_dict(self):
+        """Return {metric: {period: value}} with NaN replaced by None, as the API has always returned"""
+        if self.empty:
+            return {}
+        periods = np.datetime_as_string(self.periods, unit='D').tolist()
+        rows = np.where(np.isnan(self.values), None, self.values).tolist()
+        return {metric: dict(zip(periods, row)) for metric, row in zip(self.metrics, rows)}
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.periods.nbytes + 8 * len(self.metrics)
+
+
+_MISSING = object()
+
+
+class CompanyInfo:
+    """The subset of yfinance's info dict the app uses, without a per-ticker dict of hundreds of keys"""
+
+    FIELDS = (
+        'longName', 'sector', 'industry', 'country', 'website', 'longBusinessSummary',
+        'fullTimeEmployees', 'currentPrice', 'marketCap', 'enterpriseValue',
+        'fiftyTwoWeekHigh', 'fiftyTwoWeekLow', 'beta', 'averageVolume', 'trailingPE',
+        'forwardPE', 'pegRatio', 'priceToBook', 'priceToSalesTrailing12Months',
+        'enterpriseToRevenue', 'enterpriseToEbitda', 'profitMargins', 'operatingMargins',
+        'grossMargins', 'returnOnEquity', 'returnOnAssets', 'returnOnCapital',
+        'currentRatio', 'quickRatio', 'debtToEquity', 'totalDebt', 'totalCash',
+        'freeCashflow', 'operatingCashflow', 'revenueGrowth', 'earningsGrowth',
+        'revenuePerShare', 'trailingEps', 'forwardEps', 'dividendRate', 'dividendYield',
+        'payoutRatio', 'exDividendDate', 'targetHighPrice', 'targetLowPrice',
+        'targetMeanPrice', 'targetMedianPrice', 'recommendationKey',
+        'numberOfAnalystOpinions', 'sharesOutstanding',
+    )
+
+    __slots__ = FIELDS
+
+    def __init__(self, info):
+        for field in self.FIELDS:
+            value = info.get(field, _MISSING)
+            if isinstance(value, str):
+                value = sys.intern(value) if len(value) < 64 else value
+            setattr(self, field, value)
+
+    def get(self, key, default=None):
+        """Dict-style access so callers can treat this like the original info dict"""
+        value = getattr(self, key, _MISSING)
+        return default if value is _MISSING else value
+
+    @property
+    def nbytes(self):
+        total = object.__sizeof__(self)
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, str):
+                total += sys.getsizeof(value)
+        return total
+
+
+class TickerStore:
+    """
+    Thread-safe LRU store of compact records keyed by tuples such as ('AAPL', 'history', '2y', '1d').
+
+    Entries expire after their TTL, and the least recently used entries are evicted
+    whenever the total size of resident records exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            record, size, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    def put(self, key, record, ttl):
+        size = record.nbytes
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return record
+            self._entries[key] = (record, size, time.time() + ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return record
+
+    def get_or_load(self, key, ttl, load):
+        """Return the resident record for key, calling load() to build it on a miss"""
+        record = self.get(key)
+        if record is None:
+            record = self.put(key, load(), ttl)
+        return record
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def rolling_mean(values, window):
+    """Trailing simple moving average; the first window-1 entries are NaN (matches pandas rolling().mean())"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    return result
+
+
+def values_at_bars(dates, values, bar_dates):
+    """
+    Sample a daily series onto bars of another interval: each bar gets the value of
+    the last day that had closed by the time the bar closed (a bar closes when the
+    next one opens). Intraday bars therefore see the previous day's value until the
+    last bar of the session, and weekly and monthly bars the value at their last
+    trading day. NaN before the series starts.
+    """
+    if len(dates) == 0 or len(bar_dates) == 0:
+        return np.full(len(bar_dates), np.nan)
+    day_closes = dates + np.timedelta64(1, 'D')
+    # The last bar is assumed to be as long as the one before it
+    last_close = (bar_dates[-1] + (bar_dates[-1] - bar_dates[-2]) if len(bar_dates) > 1
+                  else np.datetime64('9999-12-31', 's'))
+    bar_closes = np.append(bar_dates[1:], last_close)
+    idx = np.searchsorted(day_closes, bar_closes, side='right') - 1
+    return np.where(idx >= 0, np.asarray(values)[np.clip(idx, 0, None)], np.nan)
+
+
+def lttb_indices(values, threshold):
+    """
+    Indices of the points kept when downsampling values to about threshold points
+    with Largest-Triangle-Three-Buckets. Points are treated as evenly spaced, which
+    matches how category-axis charts lay them out. NaN points are never chosen
+    unless a bucket contains nothing else.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    # Bucket boundaries for the n - 2 interior points; first and last points are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the triangle's third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if not np.isnan(y[next_start:next_end]).all() else y[a]
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        areas = np.nan_to_num(areas, nan=-1.0)
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
@@ -0,0 +1,299 @@
+"""
+Bulk export of get_fundamental_data output for many tickers.
+
+Reads a ticker list, fetches each ticker with bounded concurrency and a global
+rate limit, and writes fundamentals, statements and price history as
+partitioned Parquet or CSV files, one part per batch. A checkpoint file records
+every completed part, so an interrupted run resumes where it stopped.
+
+Usage:
+    python export_fundamentals.py tickers.txt --out export/ --format parquet
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+CHECKPOINT_FILE = '_checkpoint.jsonl'
+DATASETS = ('fundamentals', 'statements', 'history')
+
+# Fields flattened into the fundamentals dataset as '<section>.<field>' columns
+FUNDAMENTAL_FIELDS = {
+    'company_info': ('name', 'sector', 'industry', 'country', 'website', 'description', 'employees'),
+    'market_data': ('current_price', 'market_cap', 'enterprise_value', '52_week_high', '52_week_low',
+                    'beta', 'avg_volume'),
+    'valuation_ratios': ('pe_ratio', 'forward_pe', 'peg_ratio', 'price_to_book', 'price_to_sales',
+                         'ev_to_revenue', 'ev_to_ebitda'),
+    'profitability_ratios': ('profit_margin', 'operating_margin', 'gross_margin', 'roe', 'roa', 'roic'),
+    'financial_health': ('current_ratio', 'quick_ratio', 'debt_to_equity', 'total_debt', 'total_cash',
+                         'free_cash_flow', 'operating_cash_flow'),
+    'growth_metrics': ('revenue_growth', 'earnings_growth', 'revenue_per_share', 'eps_trailing', 'eps_forward'),
+    'dividend_info': ('dividend_rate', 'dividend_yield', 'payout_ratio', 'ex_dividend_date'),
+    'analyst_recommendations': ('target_high_price', 'target_low_price', 'target_mean_price',
+                                'target_median_price', 'recommendation', 'number_of_analyst_opinions'),
+    'trends': ('avg_pe_ratio', 'avg_price_to_fcf', 'avg_roic', 'latest_roic', 'fcf_cagr', 'revenue_cagr',
+               'net_income_cagr', 'eps_cagr', 'shares_cagr', 'latest_shares_outstanding', 'ltl_to_avg_fcf',
+               'ttm_revenue', 'ttm_net_income', 'ttm_free_cash_flow', 'years'),
+}
+
+# Columns of every part file, so the parts of a dataset can be read back as one table
+DATASET_COLUMNS = {
+    'fundamentals': ('ticker',) + tuple(f"{section}.{field}" for section, fields in FUNDAMENTAL_FIELDS.items()
+                                        for field in fields),
+    'statements': ('ticker', 'statement', 'metric', 'period', 'value'),
+    'history': ('ticker', 'date', 'close', 'volume', 'ma_50', 'ma_200'),
+}
+
+# Text columns; every other column is stored as float64
+STRING_COLUMNS = frozenset({
+    'ticker', 'statement', 'metric', 'period', 'date',
+    'company_info.name', 'company_info.sector', 'company_info.industry', 'company_info.country',
+    'company_info.website', 'company_info.description', 'analyst_recommendations.recommendation',
+})
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def read_tickers(path):
+    """Ticker symbols from a file with one per line (or a CSV whose first column is the ticker); '#' starts a comment"""
+    tickers = []
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].split(',', 1)[0].strip().upper()
+            if symbol and symbol not in ('TICKER', 'SYMBOL') and symbol not in seen:
+                seen.add(symbol)
+                tickers.append(symbol)
+    return tickers
+
+
+def load_checkpoint(out_dir):
+    """
+    Return (done, failed, next_part) from the checkpoint. A torn last entry is
+    truncated away, and part files written after the last checkpointed part
+    belong to an interrupted batch and are removed.
+    """
+    done, failed, parts = set(), {}, set()
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        valid_end = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('unterminated line')
+                    entry = json.loads(line)
+                except ValueError:
+                    # A partially written last line means that batch never completed
+                    break
+                parts.add(entry['part'])
+                done.update(entry['done'])
+                failed.update(entry['failed'])
+                valid_end += len(line)
+        # Cut off the torn entry so the next append starts on a fresh line
+        if os.path.getsize(path) > valid_end:
+            with open(path, 'r+b') as f:
+                f.truncate(valid_end)
+    for ticker in done:
+        failed.pop(ticker, None)
+
+    for dataset in DATASETS:
+        dataset_dir = os.path.join(out_dir, dataset)
+        if not os.path.isdir(dataset_dir):
+            continue
+        for name in os.listdir(dataset_dir):
+            if name.split('.', 1)[0] not in parts:
+                os.remove(os.path.join(dataset_dir, name))
+
+    next_part = max((int(part.split('-')[1]) for part in parts), default=0) + 1
+    return done, failed, next_part
+
+
+def append_checkpoint(out_dir, part, done, failed):
+    with open(os.path.join(out_dir, CHECKPOINT_FILE), 'a') as f:
+        f.write(json.dumps({'part': part, 'done': done, 'failed': failed}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def flatten_result(result):
+    """Split one get_fundamental_data result into rows for each dataset"""
+    ticker = result['ticker']
+
+    fundamentals = {'ticker': ticker}
+    for section, fields in result['analysis'].items():
+        for field, value in fields.items():
+            fundamentals[f"{section}.{field}"] = value
+    for field, value in (result.get('trends') or {}).get('summary', {}).items():
+        fundamentals[f"trends.{field}"] = value
+
+    statements = [
+        {'ticker': ticker, 'statement': statement, 'metric': metric, 'period': period, 'value': value}
+        for statement, metrics in result['financial_statements'].items()
+        for metric, values in metrics.items()
+        for period, value in values.items()
+    ]
+
+    hist = result['historical_data']
+    history = [
+        {'ticker': ticker, 'date': date, 'close': close, 'volume': volume, 'ma_50': ma_50, 'ma_200': ma_200}
+        for date, close, volume, ma_50, ma_200 in zip(hist['dates'], hist['close'], hist['volume'],
+                                                      hist['ma_50'], hist['ma_200'])
+    ]
+    return fundamentals, statements, history
+
+
+def to_frame(dataset, rows):
+    """
+    Build a part's DataFrame with the dataset's fixed columns and types. The app
+    reports missing values as 'N/A' (or 0) depending on the field, so 'N/A' is
+    stored as null rather than letting one part turn a numeric column into text.
+    """
+    df = pd.DataFrame(rows).reindex(columns=DATASET_COLUMNS[dataset])
+    for column in df.columns:
+        if column in STRING_COLUMNS:
+            df[column] = df[column].map(lambda v: None if v is None or v == 'N/A' or v != v else str(v))
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return df
+
+
+def parquet_schema(dataset):
+    import pyarrow as pa
+    return pa.schema([(column, pa.string() if column in STRING_COLUMNS else pa.float64())
+                      for column in DATASET_COLUMNS[dataset]])
+
+
+def write_part(out_dir, part, rows_by_dataset, file_format):
+    """Write one part file per dataset; each is written to a temp name and renamed into place"""
+    for dataset, rows in rows_by_dataset.items():
+        if not rows:
+            continue
+        dataset_dir = os.path.join(out_dir, dataset)
+        os.makedirs(dataset_dir, exist_ok=True)
+        path = os.path.join(dataset_dir, f"{part}.{file_format}")
+        tmp_path = path + '.tmp'
+        df = to_frame(dataset, rows)
+        if file_format == 'parquet':
+            df.to_parquet(tmp_path, index=False, schema=parquet_schema(dataset))
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_export(tickers, out_dir, file_format='parquet', concurrency=4, rate=2.0, batch_size=100,
+               chart_range='1y', interval='1d', retry_failed=True):
+    """Export every ticker not already in the checkpoint. Returns (exported, failed) counts for this run."""
+    # Imported here so the environment set by main() applies to the data layer's store and cache
+    from fundamentals import fetch_fundamental_data
+
+    os.makedirs(out_dir, exist_ok=True)
+    done, failed, part_number = load_checkpoint(out_dir)
+    skip = done if retry_failed else done | set(failed)
+    pending = [ticker for ticker in tickers if ticker not in skip]
+    print(f"{len(tickers) - len(pending)} tickers already exported, {len(pending)} remaining", file=sys.stderr)
+
+    limiter = RateLimiter(rate)
+
+    def fetch(ticker):
+        limiter.wait()
+        try:
+            return fetch_fundamental_data(ticker, chart_range, interval, None)
+        except Exception as e:
+            return {'success': False, 'error': str(e), 'ticker': ticker}
+
+    exported = errors = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # One batch in flight at a time keeps memory bounded by batch_size
+        for batch in batches(pending, batch_size):
+            rows = {dataset: [] for dataset in DATASETS}
+            batch_done, batch_failed = [], {}
+            for ticker, result in zip(batch, executor.map(fetch, batch)):
+                if result.get('success'):
+                    fundamentals, statements, history = flatten_result(result)
+                    rows['fundamentals'].append(fundamentals)
+                    rows['statements'].extend(statements)
+                    rows['history'].extend(history)
+                    batch_done.append(ticker)
+                else:
+                    batch_failed[ticker] = result.get('error', 'Unknown error')
+
+            part = f"part-{part_number:05d}"
+            write_part(out_dir, part, rows, file_format)
+            append_checkpoint(out_dir, part, batch_done, batch_failed)
+            part_number += 1
+
+            exported += len(batch_done)
+            errors += len(batch_failed)
+            print(f"{part}: {len(batch_done)} exported, {len(batch_failed)} failed "
+                  f"({exported + errors}/{len(pending)})", file=sys.stderr)
+
+    return exported, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export fundamental analysis data for a list of tickers.')
+    parser.add_argument('tickers', help='File with one ticker per line (or a CSV with tickers in the first column)')
+    parser.add_argument('--out', default='export', help='Output directory (default: export)')
+    parser.add_argument('--format', choices=('parquet', 'csv'), default='parquet',
+                        help='Output file format (parquet requires pyarrow)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Tickers fetched in parallel (default: 4)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum tickers started per second (default: 2)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Tickers per output part file (default: 100)')
+    parser.add_argument('--range', dest='chart_range', default='1y', help='Price history range (default: 1y)')
+    parser.add_argument('--interval', default='1d', help='Price history bar interval (default: 1d)')
+    parser.add_argument('--skip-failed', action='store_true',
+                        help='Do not retry tickers that failed in a previous run')
+    args = parser.parse_args(argv)
+
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error('Parquet output requires pyarrow (pip install pyarrow), or use --format csv')
+
+    # Each ticker is written out once, so there is no point keeping many resident,
+    # nor filling the web app's shared cache with thousands of one-off entries
+    os.environ.setdefault('TICKER_STORE_MAX_MB', '32')
+    os.environ.setdefault('STOCK_CACHE_BACKEND', 'none')
+    from fundamentals import CHART_RANGES, CHART_INTERVALS
+    if args.chart_range not in CHART_RANGES:
+        parser.error(f"--range must be one of: {', '.join(CHART_RANGES)}")
+    if args.interval not in CHART_INTERVALS:
+        parser.error(f"--interval must be one of: {', '.join(CHART_INTERVALS)}")
+
+    exported, errors = run_export(
+        read_tickers(args.tickers), args.out, args.format, args.concurrency, args.rate,
+        args.batch_size, args.chart_range, args.interval, retry_failed=not args.skip_failed
+    )
+    print(f"Done: {exported} exported, {errors} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
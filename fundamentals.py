@@ -0,0 +1,384 @@
+"""
+Data layer behind the analysis endpoints: fetches ticker data from Yahoo Finance
+into the in-process ticker store, derives the analysis, trends and chart data,
+and caches results in the shared cache.
+
+Kept free of Flask so the bulk exporter can use it without importing the web app.
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from cache import create_cache_from_env
+from data_store import TickerStore, PriceHistory, Statement, CompanyInfo, rolling_mean, lttb_indices, values_at_bars
+from ratio_engine import compute_trends
+
+# Shared across all worker processes on the host (see cache.py)
+cache = create_cache_from_env()
+
+# Cache lifetimes in seconds
+FUNDAMENTALS_TTL = int(os.environ.get('FUNDAMENTALS_CACHE_TTL', 15 * 60))
+# Statement-derived trends only change when a new period is filed
+TRENDS_TTL = int(os.environ.get('TRENDS_CACHE_TTL', 24 * 60 * 60))
+
+# In-process store of compact price history, statements and info (see data_store.py)
+ticker_store = TickerStore(max_bytes=int(os.environ.get('TICKER_STORE_MAX_MB', 256)) * 1024 * 1024)
+
+# yfinance attribute for each statement, keyed by the name used in API responses
+STATEMENT_ATTRIBUTES = {
+    'income_statement': 'income_stmt',
+    'balance_sheet': 'balance_sheet',
+    'cash_flow': 'cash_flow',
+    'quarterly_income': 'quarterly_income_stmt',
+    'quarterly_balance': 'quarterly_balance_sheet',
+    'quarterly_cashflow': 'quarterly_cash_flow',
+}
+
+# Chart ranges: how far back to display, and the daily period to fetch so the
+# 200-day MA is already warmed up at the start of the displayed window
+CHART_RANGES = {
+    '1mo': (pd.DateOffset(months=1), '2y'),
+    '3mo': (pd.DateOffset(months=3), '2y'),
+    '6mo': (pd.DateOffset(months=6), '2y'),
+    '1y': (pd.DateOffset(years=1), '2y'),
+    '2y': (pd.DateOffset(years=2), '5y'),
+    '5y': (pd.DateOffset(years=5), '10y'),
+    '10y': (pd.DateOffset(years=10), 'max'),
+    'max': (None, 'max'),
+}
+
+# Chart intervals and the longest period Yahoo Finance serves for each
+CHART_INTERVALS = {
+    '5m': '60d',
+    '15m': '60d',
+    '30m': '60d',
+    '1h': '730d',
+    '1d': None,
+    '1wk': 'max',
+    '1mo': 'max',
+}
+
+# Daily period fetched for the 50/200-day moving averages on other intervals: it covers
+# the interval's longest period plus 200 trading days of warm-up
+MA_DAILY_PERIODS = {
+    '5m': '2y',
+    '15m': '2y',
+    '30m': '2y',
+    '1h': '5y',
+    '1wk': 'max',
+    '1mo': 'max',
+}
+
+DEFAULT_CHART_POINTS = 1000
+
+def clean_value(value):
+    """Convert NaN, inf, and other non-JSON-serializable values to None"""
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value) or math.isinf(value):
+            return None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+def clean_dict(d):
+    """Recursively clean dictionary of NaN values"""
+    if isinstance(d, dict):
+        return {k: clean_dict(v) for k, v in d.items()}
+    elif isinstance(d, list):
+        return [clean_dict(item) for item in d]
+    elif isinstance(d, (float, np.floating)):
+        if math.isnan(d) or math.isinf(d):
+            return None
+        return d
+    elif isinstance(d, np.integer):
+        return int(d)
+    else:
+        return d
+
+def load_company_info(ticker):
+    """Return the compact info record for a yf.Ticker, fetching it on a store miss"""
+    return ticker_store.get_or_load(
+        (ticker.ticker, 'info'), FUNDAMENTALS_TTL,
+        lambda: CompanyInfo(ticker.info)
+    )
+
+def load_statement(ticker, name):
+    """Return one financial statement (a key of STATEMENT_ATTRIBUTES) as a compact matrix"""
+    return ticker_store.get_or_load(
+        (ticker.ticker, name), FUNDAMENTALS_TTL,
+        lambda: Statement.from_dataframe(getattr(ticker, STATEMENT_ATTRIBUTES[name]))
+    )
+
+def load_price_history(ticker, period, interval='1d', auto_adjust=True):
+    """
+    Return price history for a yf.Ticker as compact arrays. With auto_adjust=False
+    closes are adjusted for splits only, i.e. the prices actually quoted at the time.
+    """
+    return ticker_store.get_or_load(
+        (ticker.ticker, 'history' if auto_adjust else 'unadjusted_history', period, interval), FUNDAMENTALS_TTL,
+        lambda: PriceHistory.from_dataframe(ticker.history(period=period, interval=interval, auto_adjust=auto_adjust))
+    )
+
+def get_trends(ticker, statements):
+    """
+    Multi-year ratio trends for a yf.Ticker, cached per ticker and latest filing period
+    """
+    filings = ':'.join(
+        np.datetime_as_string(statements[name].periods.max(), unit='D') if not statements[name].empty else '-'
+        for name in ('income_statement', 'quarterly_income')
+    )
+    return cache.get_or_set(
+        f"trends:{ticker.ticker}:{filings}",
+        TRENDS_TTL,
+        # Monthly closes are enough to price each fiscal year end. They must not be
+        # dividend-adjusted, since the EPS, FCF and share counts they're divided by aren't.
+        lambda: clean_dict(compute_trends(statements, load_price_history(ticker, '10y', '1mo', auto_adjust=False)))
+    )
+
+def build_historical_data(ticker, chart_range='1y', interval='1d', points=DEFAULT_CHART_POINTS):
+    """
+    Price history for the chart over chart_range at the given bar interval.
+    The 50- and 200-day moving averages are computed on daily closes whatever the
+    interval, and cross signals on the full fetched series; then the displayed
+    window is downsampled (LTTB) to about `points` bars, or returned in full when
+    points is None.
+    """
+    offset, daily_period = CHART_RANGES[chart_range]
+    period = daily_period if interval == '1d' else CHART_INTERVALS[interval]
+    hist_full = load_price_history(ticker, period, interval)
+    close_full = hist_full.close
+
+    # Calculate moving averages on full dataset
+    if interval == '1d':
+        ma_50_full = rolling_mean(close_full, 50)
+        ma_200_full = rolling_mean(close_full, 200)
+    else:
+        # 50 weekly or hourly bars are not a 50-day average, so sample the daily ones
+        daily = load_price_history(ticker, MA_DAILY_PERIODS[interval], '1d')
+        ma_50_full = values_at_bars(daily.dates, rolling_mean(daily.close, 50), hist_full.dates)
+        ma_200_full = values_at_bars(daily.dates, rolling_mean(daily.close, 200), hist_full.dates)
+
+    # Index of the first bar inside the displayed range
+    if offset is None or len(hist_full) == 0:
+        window_start = 0
+    else:
+        cutoff = (pd.Timestamp(hist_full.dates[-1]) - offset).to_datetime64()
+        window_start = int(np.searchsorted(hist_full.dates, cutoff, side='right'))
+
+    # Detect golden/death crosses within the displayed range
+    cross_signals = []
+    start = max(window_start, 1)
+
+    spread = ma_50_full - ma_200_full
+    prev_spread, cur_spread = spread[start - 1:-1], spread[start:]
+    valid = ~np.isnan(prev_spread) & ~np.isnan(cur_spread)
+    # Golden Cross: 50-day crosses above 200-day; Death Cross: 50-day crosses below 200-day
+    golden = valid & (prev_spread <= 0) & (cur_spread > 0)
+    death = valid & (prev_spread >= 0) & (cur_spread < 0)
+    cross_idx = np.flatnonzero(golden | death) + start
+
+    all_dates = hist_full.date_strings('m' if interval in ('5m', '15m', '30m', '1h') else 'D')
+    for i in cross_idx:
+        cross_signals.append({
+            'type': 'golden' if golden[i - start] else 'death',
+            'date': all_dates[i],
+            'price': float(close_full[i])
+        })
+
+    # Downsample the displayed window, always keeping the bars where crosses occur
+    if points is None:
+        keep = np.arange(window_start, len(hist_full))
+    else:
+        keep = lttb_indices(close_full[window_start:], points) + window_start
+        keep = np.union1d(keep, cross_idx).astype(np.int64)
+
+    return {
+        'dates': [all_dates[i] for i in keep],
+        'close': close_full[keep].tolist(),
+        'volume': hist_full.volume[keep].tolist(),
+        'ma_50': ma_50_full[keep].tolist(),
+        'ma_200': ma_200_full[keep].tolist(),
+        'cross_signals': cross_signals,
+        'range': chart_range,
+        'interval': interval,
+        'total_points': len(hist_full) - window_start,
+        'ticker': ticker.ticker
+    }
+
+def get_fundamental_data(ticker_symbol, chart_range='1y', interval='1d', points=DEFAULT_CHART_POINTS):
+    """
+    Return fundamental analysis data for a ticker, served from the shared cache when fresh.
+    The analysis is cached once per ticker and the chart data per range, so changing
+    the chart range doesn't store another copy of the fundamentals.
+    """
+    result = cache.get_or_set(
+        f"fundamentals:{ticker_symbol.upper()}",
+        FUNDAMENTALS_TTL,
+        lambda: fetch_analysis(ticker_symbol),
+        should_cache=lambda result: result.get('success')
+    )
+    if not result['success']:
+        return result
+
+    history = get_historical_data(ticker_symbol, chart_range, interval, points)
+    if not history['success']:
+        return {'success': False, 'error': history['error'], 'ticker': ticker_symbol.upper()}
+    return {**result, 'historical_data': history['historical_data']}
+
+def get_historical_data(ticker_symbol, chart_range='1y', interval='1d', points=DEFAULT_CHART_POINTS):
+    """
+    Return chart data only, served from the shared cache when fresh
+    """
+    def fetch():
+        try:
+            historical_data = build_historical_data(yf.Ticker(ticker_symbol.upper()), chart_range, interval, points)
+            return clean_dict({'success': True, 'historical_data': historical_data})
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    return cache.get_or_set(
+        f"history:{ticker_symbol.upper()}:{chart_range}:{interval}:{points}",
+        FUNDAMENTALS_TTL,
+        fetch,
+        should_cache=lambda result: result.get('success')
+    )
+
+def parse_chart_params(data):
+    """
+    Read and validate range/interval/points from a request body.
+    Returns (chart_range, interval, points, error); error is None when valid.
+    """
+    chart_range = data.get('range', '1y')
+    interval = data.get('interval', '1d')
+    if chart_range not in CHART_RANGES:
+        return None, None, None, f"Unsupported range '{chart_range}'. Use one of: {', '.join(CHART_RANGES)}"
+    if interval not in CHART_INTERVALS:
+        return None, None, None, f"Unsupported interval '{interval}'. Use one of: {', '.join(CHART_INTERVALS)}"
+    try:
+        points = min(max(int(data.get('points', DEFAULT_CHART_POINTS)), 100), 5000)
+    except (TypeError, ValueError):
+        return None, None, None, 'points must be an integer'
+    return chart_range, interval, points, None
+
+def fetch_fundamental_data(ticker_symbol, chart_range='1y', interval='1d', points=DEFAULT_CHART_POINTS):
+    """
+    Fetch comprehensive fundamental analysis data, including chart data, for a given stock ticker
+    """
+    result = fetch_analysis(ticker_symbol)
+    if not result['success']:
+        return result
+
+    try:
+        historical_data = build_historical_data(yf.Ticker(ticker_symbol.upper()), chart_range, interval, points)
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'ticker': ticker_symbol.upper()}
+    return {**result, 'historical_data': clean_dict(historical_data)}
+
+def fetch_analysis(ticker_symbol):
+    """
+    Fetch the range-independent part of the analysis (company info, ratios, statements, trends)
+    """
+    try:
+        ticker = yf.Ticker(ticker_symbol.upper())
+
+        # Get basic info
+        info = load_company_info(ticker)
+
+        # Get financial statements (annual and quarterly)
+        statements = {name: load_statement(ticker, name) for name in STATEMENT_ATTRIBUTES}
+
+        # Calculate key ratios and metrics
+        analysis = {
+            'company_info': {
+                'name': info.get('longName', 'N/A'),
+                'sector': info.get('sector', 'N/A'),
+                'industry': info.get('industry', 'N/A'),
+                'country': info.get('country', 'N/A'),
+                'website': info.get('website', 'N/A'),
+                'description': info.get('longBusinessSummary', 'N/A'),
+                'employees': clean_value(info.get('fullTimeEmployees', 'N/A')),
+            },
+            'market_data': {
+                'current_price': clean_value(info.get('currentPrice', 0)),
+                'market_cap': clean_value(info.get('marketCap', 0)),
+                'enterprise_value': clean_value(info.get('enterpriseValue', 0)),
+                '52_week_high': clean_value(info.get('fiftyTwoWeekHigh', 0)),
+                '52_week_low': clean_value(info.get('fiftyTwoWeekLow', 0)),
+                'beta': clean_value(info.get('beta', 0)),
+                'avg_volume': clean_value(info.get('averageVolume', 0)),
+            },
+            'valuation_ratios': {
+                'pe_ratio': clean_value(info.get('trailingPE', 0)),
+                'forward_pe': clean_value(info.get('forwardPE', 0)),
+                'peg_ratio': clean_value(info.get('pegRatio', 0)),
+                'price_to_book': clean_value(info.get('priceToBook', 0)),
+                'price_to_sales': clean_value(info.get('priceToSalesTrailing12Months', 0)),
+                'ev_to_revenue': clean_value(info.get('enterpriseToRevenue', 0)),
+                'ev_to_ebitda': clean_value(info.get('enterpriseToEbitda', 0)),
+            },
+            'profitability_ratios': {
+                'profit_margin': clean_value(info.get('profitMargins', 0)),
+                'operating_margin': clean_value(info.get('operatingMargins', 0)),
+                'gross_margin': clean_value(info.get('grossMargins', 0)),
+                'roe': clean_value(info.get('returnOnEquity', 0)),
+                'roa': clean_value(info.get('returnOnAssets', 0)),
+                'roic': clean_value(info.get('returnOnCapital', 0)),
+            },
+            'financial_health': {
+                'current_ratio': clean_value(info.get('currentRatio', 0)),
+                'quick_ratio': clean_value(info.get('quickRatio', 0)),
+                'debt_to_equity': clean_value(info.get('debtToEquity', 0)),
+                'total_debt': clean_value(info.get('totalDebt', 0)),
+                'total_cash': clean_value(info.get('totalCash', 0)),
+                'free_cash_flow': clean_value(info.get('freeCashflow', 0)),
+                'operating_cash_flow': clean_value(info.get('operatingCashflow', 0)),
+            },
+            'growth_metrics': {
+                'revenue_growth': clean_value(info.get('revenueGrowth', 0)),
+                'earnings_growth': clean_value(info.get('earningsGrowth', 0)),
+                'revenue_per_share': clean_value(info.get('revenuePerShare', 0)),
+                'eps_trailing': clean_value(info.get('trailingEps', 0)),
+                'eps_forward': clean_value(info.get('forwardEps', 0)),
+            },
+            'dividend_info': {
+                'dividend_rate': clean_value(info.get('dividendRate', 0)),
+                'dividend_yield': clean_value(info.get('dividendYield', 0)),
+                'payout_ratio': clean_value(info.get('payoutRatio', 0)),
+                'ex_dividend_date': info.get('exDividendDate', 'N/A'),
+            },
+            'analyst_recommendations': {
+                'target_high_price': clean_value(info.get('targetHighPrice', 0)),
+                'target_low_price': clean_value(info.get('targetLowPrice', 0)),
+                'target_mean_price': clean_value(info.get('targetMeanPrice', 0)),
+                'target_median_price': clean_value(info.get('targetMedianPrice', 0)),
+                'recommendation': info.get('recommendationKey', 'N/A'),
+                'number_of_analyst_opinions': clean_value(info.get('numberOfAnalystOpinions', 0)),
+            }
+        }
+
+        # Convert financial statements to JSON-serializable format
+        # Structure: {metric_name: {date1: value1, date2: value2}}
+        financial_statements = {name: statement.to_dict() for name, statement in statements.items()}
+
+        result = {
+            'success': True,
+            'ticker': ticker_symbol.upper(),
+            'analysis': analysis,
+            'financial_statements': financial_statements,
+            'trends': get_trends(ticker, statements),
+        }
+
+        # Clean all NaN values before returning
+        return clean_dict(result)
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'ticker': ticker_symbol.upper()
+        }
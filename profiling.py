@@ -0,0 +1,221 @@
+"""
+Opt-in per-request profiling.
+
+When PROFILING_TOKEN is set, a request can be profiled by sending it with the
+headers `X-Profile: 1` and `X-Profile-Token: <token>`, and PROFILE_SAMPLE_RATE
+(percent) profiles that share of requests to PROFILED_PATHS automatically.
+A profiled request is sampled by a background thread that records the request
+thread's stack every PROFILE_INTERVAL_MS. Results are saved as collapsed stacks
+(the input format of flamegraph.pl and speedscope) plus a JSON summary, and
+served from /admin/profiles.
+
+Sending `X-Profile: alloc` instead also summarizes allocations with tracemalloc.
+tracemalloc is process-wide: while it runs it slows every thread in the worker,
+and allocations made by concurrent requests are counted too. It is therefore
+never enabled for rate-sampled requests, and only one request at a time traces.
+
+When PROFILING_TOKEN is unset, nothing is registered and requests run untouched.
+"""
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from flask import Response, abort, g, jsonify, request
+
+PROFILED_PATHS = ('/api/analyze', '/api/generate-pdf')
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Samples in collapsed-stack format: one 'root;...;leaf count' line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def allocation_summary(snapshot, limit=20):
+    """Top allocation sites by size from a tracemalloc snapshot"""
+    return [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def init_profiling(app):
+    """Register profiling hooks and admin endpoints on app if PROFILING_TOKEN is configured"""
+    token = os.environ.get('PROFILING_TOKEN')
+    if not token:
+        return
+
+    sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    interval = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+    max_profiles = int(os.environ.get('PROFILE_MAX_FILES', 100))
+    profile_dir = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'stock_analysis_profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+
+    # tracemalloc is process-wide, so only one request traces allocations at a time
+    tracing_lock = threading.Lock()
+
+    def authorized():
+        return hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+    def requested():
+        """Return None, 'stacks' or 'alloc' for the current request"""
+        mode = request.headers.get('X-Profile')
+        if mode in ('1', 'alloc'):
+            if not authorized():
+                return None
+            return 'alloc' if mode == 'alloc' else 'stacks'
+        if request.path in PROFILED_PATHS and random.random() * 100 < sample_rate:
+            return 'stacks'
+        return None
+
+    @app.before_request
+    def start_profile():
+        mode = requested()
+        if mode is None:
+            return
+        g.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        g.profiler = SamplingProfiler(threading.get_ident(), interval)
+        # Another request already tracing means this one records stacks only
+        g.profile_tracing = mode == 'alloc' and tracing_lock.acquire(blocking=False)
+        if g.profile_tracing:
+            tracemalloc.start()
+        g.profile_started = time.perf_counter()
+        g.profiler.start()
+
+    def stop_tracing():
+        if g.pop('profile_tracing', False):
+            tracemalloc.stop()
+            tracing_lock.release()
+
+    @app.after_request
+    def finish_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        snapshot = peak = None
+        try:
+            profiler.stop()
+            duration = time.perf_counter() - g.profile_started
+            if g.get('profile_tracing'):
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+        finally:
+            stop_tracing()
+
+        profile_id = g.profile_id
+        body = request.get_json(silent=True) or {}
+        summary = {
+            'id': profile_id,
+            'path': request.path,
+            'method': request.method,
+            'ticker': body.get('ticker') if isinstance(body, dict) else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'samples': sum(profiler.samples.values()),
+            'interval_ms': interval * 1000,
+            # Allocation figures cover the whole worker process, not just this request
+            'peak_memory_kb': round(peak / 1024, 1) if peak is not None else None,
+            'allocations': allocation_summary(snapshot) if snapshot is not None else None,
+        }
+        with open(os.path.join(profile_dir, f"{profile_id}.collapsed"), 'w') as f:
+            f.write(profiler.collapsed())
+        with open(os.path.join(profile_dir, f"{profile_id}.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        # Drop the oldest profiles beyond the retention limit
+        saved = sorted(name[:-5] for name in os.listdir(profile_dir) if name.endswith('.json'))
+        for old_id in saved[:-max_profiles] if max_profiles > 0 else []:
+            for ext in ('.json', '.collapsed'):
+                path = os.path.join(profile_dir, old_id + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exc):
+        # after_request is skipped when a view raises, so clean up here instead
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            stop_tracing()
+
+    def profile_path(profile_id, ext):
+        # Only ids generated above are valid; this also rules out path traversal
+        if not all(c.isalnum() or c == '-' for c in profile_id):
+            abort(404)
+        path = os.path.join(profile_dir, profile_id + ext)
+        if not os.path.exists(path):
+            abort(404)
+        return path
+
+    @app.route('/admin/profiles', methods=['GET'])
+    def list_profiles():
+        """API endpoint to list saved request profiles, newest first"""
+        if not authorized():
+            abort(403)
+        profiles = []
+        for name in sorted(os.listdir(profile_dir), reverse=True):
+            if name.endswith('.json'):
+                with open(os.path.join(profile_dir, name)) as f:
+                    summary = json.load(f)
+                summary.pop('allocations', None)
+                profiles.append(summary)
+        return jsonify({'success': True, 'profiles': profiles})
+
+    @app.route('/admin/profiles/<profile_id>', methods=['GET'])
+    def get_profile(profile_id):
+        """API endpoint to get one profile's summary and allocation statistics"""
+        if not authorized():
+            abort(403)
+        with open(profile_path(profile_id, '.json')) as f:
+            return jsonify({'success': True, 'profile': json.load(f)})
+
+    @app.route('/admin/profiles/<profile_id>/collapsed', methods=['GET'])
+    def get_profile_stacks(profile_id):
+        """API endpoint to download a profile's collapsed stacks (feed to flamegraph.pl or speedscope)"""
+        if not authorized():
+            abort(403)
+        with open(profile_path(profile_id, '.collapsed')) as f:
+            return Response(f.read(), mimetype='text/plain')
@@ -0,0 +1,220 @@
+"""
+Multi-year ratio engine for the Eight Commandments pillars.
+
+Annual statement rows are aligned into one metrics x periods matrix; derived
+ratios (ROIC, P/E, P/FCF) are stacked onto it as extra rows, and year-over-year
+growth and CAGR are then computed for every row at once.
+"""
+import warnings
+
+import numpy as np
+
+# Statement rows for each metric, in order of preference
+METRIC_ROWS = {
+    'revenue': [('income_statement', 'Total Revenue'), ('income_statement', 'Operating Revenue')],
+    'net_income': [('income_statement', 'Net Income'), ('income_statement', 'Net Income Common Stockholders')],
+    'eps': [('income_statement', 'Diluted EPS'), ('income_statement', 'Basic EPS')],
+    'ebit': [('income_statement', 'EBIT'), ('income_statement', 'Operating Income')],
+    'pretax_income': [('income_statement', 'Pretax Income')],
+    'tax_provision': [('income_statement', 'Tax Provision')],
+    'invested_capital': [('balance_sheet', 'Invested Capital')],
+    'total_debt': [('balance_sheet', 'Total Debt')],
+    'equity': [('balance_sheet', 'Stockholders Equity'), ('balance_sheet', 'Common Stock Equity')],
+    'long_term_debt': [('balance_sheet', 'Long Term Debt'),
+                       ('balance_sheet', 'Long Term Debt And Capital Lease Obligation')],
+    'shares_outstanding': [('balance_sheet', 'Ordinary Shares Number'), ('balance_sheet', 'Share Issued'),
+                           ('income_statement', 'Diluted Average Shares')],
+    'operating_cash_flow': [('cash_flow', 'Operating Cash Flow')],
+    'capital_expenditure': [('cash_flow', 'Capital Expenditure')],
+    'free_cash_flow': [('cash_flow', 'Free Cash Flow')],
+}
+
+# Quarterly rows summed over the last four quarters for trailing-twelve-month figures
+TTM_ROWS = {
+    'revenue': ('quarterly_income', 'Total Revenue'),
+    'net_income': ('quarterly_income', 'Net Income'),
+    'free_cash_flow': ('quarterly_cashflow', 'Free Cash Flow'),
+}
+
+# Rows of the trend matrix returned to clients, in display order
+SERIES = ('revenue', 'net_income', 'eps', 'free_cash_flow', 'shares_outstanding',
+          'long_term_debt', 'roic', 'pe_ratio', 'price_to_fcf', 'ltl_to_avg_fcf')
+
+# Statutory rate assumed when a year's effective tax rate can't be derived
+DEFAULT_TAX_RATE = 0.21
+
+# Statement columns within this many days of a period end are treated as the same fiscal year
+PERIOD_TOLERANCE = np.timedelta64(31, 'D')
+
+
+def _nanmean(values):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(values, axis=-1)
+
+
+def _safe_divide(numerator, denominator, positive_denominator=False):
+    """Elementwise division that yields NaN instead of inf or warnings"""
+    denominator = np.asarray(denominator, dtype=np.float64)
+    valid = denominator > 0 if positive_denominator else denominator != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, numerator / np.where(valid, denominator, 1.0), np.nan)
+
+
+def _aligned_row(statement, metric, periods):
+    """Values of one statement row at the given period ends (NaN where the statement has no matching column)"""
+    row = statement.row(metric)
+    result = np.full(len(periods), np.nan)
+    if row is None or len(statement.periods) == 0:
+        return result
+    order = np.argsort(statement.periods)
+    columns, values = statement.periods[order], row[order]
+    idx = np.clip(np.searchsorted(columns, periods), 0, len(columns) - 1)
+    prev_idx = np.clip(idx - 1, 0, len(columns) - 1)
+    # Pick whichever neighbouring column is closer to each period end
+    use_prev = np.abs(columns[prev_idx] - periods) < np.abs(columns[idx] - periods)
+    idx = np.where(use_prev, prev_idx, idx)
+    matched = np.abs(columns[idx] - periods) <= PERIOD_TOLERANCE
+    result[matched] = values[idx[matched]]
+    return result
+
+
+def build_metric_matrix(statements, periods):
+    """Stack METRIC_ROWS into a metrics x periods matrix, falling back through candidate rows"""
+    matrix = np.full((len(METRIC_ROWS), len(periods)), np.nan)
+    for i, candidates in enumerate(METRIC_ROWS.values()):
+        for statement_name, row_name in candidates:
+            statement = statements.get(statement_name)
+            if statement is None or statement.empty:
+                continue
+            missing = np.isnan(matrix[i])
+            if not missing.any():
+                break
+            matrix[i, missing] = _aligned_row(statement, row_name, periods)[missing]
+    return matrix
+
+
+def prices_at(history, periods):
+    """Last close on or before each period end, NaN if the history doesn't reach back that far"""
+    if history is None or len(history) == 0:
+        return np.full(len(periods), np.nan)
+    idx = np.searchsorted(history.dates, periods, side='right') - 1
+    return np.where(idx >= 0, history.close[np.clip(idx, 0, None)], np.nan)
+
+
+def expanding_nanmean(values):
+    """Mean of the reported values up to and including each position (NaN until the first one)"""
+    reported = ~np.isnan(values)
+    counts = np.cumsum(reported)
+    return _safe_divide(np.cumsum(np.where(reported, values, 0.0)), counts)
+
+
+def growth_rates(matrix):
+    """Year-over-year growth for every row; NaN where the prior value is not positive"""
+    growth = np.full(matrix.shape, np.nan)
+    if matrix.shape[1] > 1:
+        growth[:, 1:] = _safe_divide(matrix[:, 1:], matrix[:, :-1], positive_denominator=True) - 1
+    return growth
+
+
+def cagr(matrix, periods):
+    """Compound annual growth rate of every row between its first and last reported periods"""
+    if matrix.shape[1] < 2:
+        return np.full(matrix.shape[0], np.nan)
+    reported = ~np.isnan(matrix)
+    rows = np.arange(matrix.shape[0])
+    first_idx = np.argmax(reported, axis=1)
+    last_idx = matrix.shape[1] - 1 - np.argmax(reported[:, ::-1], axis=1)
+    years = (periods[last_idx] - periods[first_idx]) / np.timedelta64(1, 'D') / 365.25
+    ratio = _safe_divide(matrix[rows, last_idx], matrix[rows, first_idx], positive_denominator=True)
+    valid = (ratio > 0) & (years > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, np.power(np.where(valid, ratio, 1.0), 1 / np.where(valid, years, 1.0)) - 1, np.nan)
+
+
+def trailing_twelve_months(statements):
+    """Sum of the last four quarters for each TTM_ROWS metric, NaN unless all four are reported"""
+    ttm = {}
+    for name, (statement_name, row_name) in TTM_ROWS.items():
+        statement = statements.get(statement_name)
+        row = statement.row(row_name) if statement is not None and not statement.empty else None
+        if row is None:
+            ttm[name] = np.nan
+            continue
+        latest = row[np.argsort(statement.periods)][-4:]
+        ttm[name] = float(latest.sum()) if len(latest) == 4 and not np.isnan(latest).any() else np.nan
+    return ttm
+
+
+def compute_trends(statements, history):
+    """
+    Multi-year ratios and growth from the annual and quarterly statements.
+
+    statements maps the API statement names (income_statement, quarterly_income, ...)
+    to Statement matrices; history is a PriceHistory of split-adjusted (but not
+    dividend-adjusted) closes used for prices at each fiscal year end. Returns a JSON-ready dict (NaN values still need cleaning).
+    """
+    income = statements.get('income_statement')
+    periods = np.sort(income.periods) if income is not None else np.empty(0, dtype='datetime64[s]')
+    names = list(METRIC_ROWS)
+    matrix = build_metric_matrix(statements, periods)
+    row = dict(zip(names, matrix))
+
+    # Free cash flow falls back to operating cash flow plus (negative) capex
+    fcf = np.where(np.isnan(row['free_cash_flow']),
+                   row['operating_cash_flow'] + row['capital_expenditure'], row['free_cash_flow'])
+    # Invested capital falls back to debt plus equity
+    invested_capital = np.where(np.isnan(row['invested_capital']),
+                                row['total_debt'] + row['equity'], row['invested_capital'])
+
+    tax_rate = _safe_divide(row['tax_provision'], row['pretax_income'], positive_denominator=True)
+    tax_rate = np.where(np.isnan(tax_rate), DEFAULT_TAX_RATE, np.clip(tax_rate, 0, 0.5))
+    roic = _safe_divide(row['ebit'] * (1 - tax_rate), invested_capital, positive_denominator=True)
+
+    prices = prices_at(history, periods)
+    market_cap = prices * row['shares_outstanding']
+    pe_ratio = _safe_divide(prices, row['eps'], positive_denominator=True)
+    price_to_fcf = _safe_divide(market_cap, fcf, positive_denominator=True)
+    # Each year's long-term debt over the average FCF of the years reported so far
+    ltl_to_avg_fcf = _safe_divide(row['long_term_debt'], expanding_nanmean(fcf), positive_denominator=True)
+
+    derived = {
+        'free_cash_flow': fcf,
+        'roic': roic,
+        'pe_ratio': pe_ratio,
+        'price_to_fcf': price_to_fcf,
+        'ltl_to_avg_fcf': ltl_to_avg_fcf,
+    }
+    trend = np.vstack([derived.get(name, row.get(name)) for name in SERIES])
+    series = dict(zip(SERIES, trend))
+
+    growth = dict(zip(SERIES, growth_rates(trend)))
+    rates = dict(zip(SERIES, cagr(trend, periods)))
+    ttm = trailing_twelve_months(statements)
+
+    # Latest-year values; everything is NaN when no annual statements were filed
+    latest = trend[:, -1] if len(periods) else np.full(len(SERIES), np.nan)
+    latest = dict(zip(SERIES, latest))
+
+    return {
+        'periods': np.datetime_as_string(periods, unit='D').tolist(),
+        'series': {name: values.tolist() for name, values in series.items()},
+        'fcf_growth': growth['free_cash_flow'].tolist(),
+        'summary': {
+            'avg_pe_ratio': float(_nanmean(pe_ratio)),
+            'avg_price_to_fcf': float(_nanmean(price_to_fcf)),
+            'avg_roic': float(_nanmean(roic)),
+            'latest_roic': float(latest['roic']),
+            'fcf_cagr': float(rates['free_cash_flow']),
+            'revenue_cagr': float(rates['revenue']),
+            'net_income_cagr': float(rates['net_income']),
+            'eps_cagr': float(rates['eps']),
+            'shares_cagr': float(rates['shares_outstanding']),
+            'latest_shares_outstanding': float(latest['shares_outstanding']),
+            'ltl_to_avg_fcf': float(latest['ltl_to_avg_fcf']),
+            'ttm_revenue': ttm['revenue'],
+            'ttm_net_income': ttm['net_income'],
+            'ttm_free_cash_flow': ttm['free_cash_flow'],
+            'years': len(periods),
+        },
+    }
@@ -1,5 +1,19 @@
 let priceChart = null;
 let currentData = null;
+let currentChartRange = '1y';
+let pillarCharts = [];
+let pendingPillarCharts = [];
+
+const CHART_RANGE_LABELS = {
+    '1mo': '1 Month',
+    '3mo': '3 Months',
+    '6mo': '6 Months',
+    '1y': '1 Year',
+    '2y': '2 Years',
+    '5y': '5 Years',
+    '10y': '10 Years',
+    'max': 'All Time'
+};
 
 document.addEventListener('DOMContentLoaded', function() {
     const tickerInput = document.getElementById('tickerInput');
@@ -81,6 +95,9 @@ document.addEventListener('DOMContentLoaded', function() {
         if (e.target.classList.contains('fin-tab')) {
             switchFinancialTab(e.target.dataset.fintab);
         }
+        if (e.target.classList.contains('range-btn')) {
+            changeChartRange(e.target.dataset.range);
+        }
         // Handle mover card clicks
         if (e.target.closest('.mover-card')) {
             const symbol = e.target.closest('.mover-card').dataset.symbol;
@@ -135,7 +152,7 @@ async function analyzeTicker() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ ticker: ticker })
+            body: JSON.stringify({ ticker: ticker, range: currentChartRange })
         });
 
         const data = await response.json();
@@ -224,83 +241,93 @@ function displayPillars(data) {
     const pillarsGrid = document.getElementById('pillarsGrid');
     pillarsGrid.innerHTML = '';
 
-    // Generate sample trend data (in production, this would come from historical data)
-    const generateTrendData = (baseValue, growthRate) => {
-        const data = [];
-        let value = baseValue * 0.85;
-        for (let i = 0; i < 20; i++) {
-            value = value * (1 + (Math.random() * 0.1 - 0.05 + growthRate));
-            data.push(value);
-        }
-        return data;
-    };
+    // Release charts from the previous ticker
+    pillarCharts.forEach(chart => chart.destroy());
+    pillarCharts = [];
+    pendingPillarCharts = [];
+
+    // Multi-year values and yearly series derived from the financial statements
+    const trends = data.trends || { series: {}, summary: {} };
+    const summary = trends.summary || {};
+    const series = trends.series || {};
+    const trendData = (name, scale = 1) => (series[name] || []).map(v => (v === null ? null : v * scale));
+    const formatRate = (rate) => (rate === null || rate === undefined ? null : (rate * 100).toFixed(2) + '%');
+
+    // No point-in-time fallbacks: a ticker without usable statements shows N/A
+    const avgPe = summary.avg_pe_ratio;
+    const avgPriceToFcf = summary.avg_price_to_fcf;
+    const avgRoic = summary.avg_roic;
+    const ltlToFcf = summary.ltl_to_avg_fcf;
+    const fcfCagr = summary.fcf_cagr;
+    const netIncomeCagr = summary.net_income_cagr;
+    const revenueCagr = summary.revenue_cagr;
+    const sharesCagr = summary.shares_cagr;
 
     const pillars = [
         {
             title: '5Y P/E Ratio',
-            value: data.analysis.valuation_ratios.pe_ratio,
+            value: avgPe,
             preference: 'Below 22.5',
-            good: data.analysis.valuation_ratios.pe_ratio && data.analysis.valuation_ratios.pe_ratio < 22.5,
-            trendData: generateTrendData(data.analysis.valuation_ratios.pe_ratio || 30, -0.01)
+            good: avgPe && avgPe < 22.5,
+            trendData: trendData('pe_ratio')
         },
         {
             title: '5Y Price/Free Cash Flow',
-            value: data.analysis.valuation_ratios.forward_pe,
+            value: avgPriceToFcf,
             preference: 'Below 22.5',
-            good: data.analysis.valuation_ratios.forward_pe && data.analysis.valuation_ratios.forward_pe < 22.5,
-            trendData: generateTrendData(data.analysis.valuation_ratios.forward_pe || 30, -0.01)
+            good: avgPriceToFcf && avgPriceToFcf < 22.5,
+            trendData: trendData('price_to_fcf')
         },
         {
             title: '5Y ROIC',
-            value: data.analysis.profitability_ratios.roic,
+            value: avgRoic,
             preference: 'Above 9%',
             isPercent: true,
-            good: data.analysis.profitability_ratios.roic && data.analysis.profitability_ratios.roic > 0.09,
-            growthRate: '9%',
-            trendData: generateTrendData((data.analysis.profitability_ratios.roic || 0.15) * 100, 0.02)
+            good: avgRoic !== null && avgRoic !== undefined && avgRoic > 0.09,
+            trendData: trendData('roic', 100)
         },
         {
             title: 'LTL / 5Y FCF',
-            value: data.analysis.financial_health.debt_to_equity,
+            value: ltlToFcf,
             preference: 'Below 5',
-            good: data.analysis.financial_health.debt_to_equity && data.analysis.financial_health.debt_to_equity < 5,
-            trendData: generateTrendData(data.analysis.financial_health.debt_to_equity || 3, -0.02)
+            good: ltlToFcf !== null && ltlToFcf !== undefined && ltlToFcf < 5,
+            trendData: trendData('ltl_to_avg_fcf')
         },
         {
             title: 'Cash Flow Growth 5Y',
-            value: data.analysis.financial_health.free_cash_flow,
+            value: fcfCagr,
             preference: 'Above 9%',
-            isCurrency: true,
-            good: data.analysis.financial_health.free_cash_flow && data.analysis.financial_health.free_cash_flow > 0,
-            growthRate: '9%',
-            trendData: generateTrendData((data.analysis.financial_health.free_cash_flow || 1e9) / 1e8, 0.09)
+            isPercent: true,
+            good: fcfCagr !== null && fcfCagr !== undefined && fcfCagr > 0.09,
+            growthRate: formatRate(fcfCagr),
+            trendData: trendData('free_cash_flow')
         },
         {
             title: 'Net Income Growth 5Y',
-            value: data.analysis.growth_metrics.earnings_growth,
+            value: netIncomeCagr,
             preference: 'Above 12%',
             isPercent: true,
-            good: data.analysis.growth_metrics.earnings_growth && data.analysis.growth_metrics.earnings_growth > 0.12,
-            growthRate: '12%',
-            trendData: generateTrendData((data.analysis.growth_metrics.earnings_growth || 0.1) * 1000, 0.12)
+            good: netIncomeCagr !== null && netIncomeCagr !== undefined && netIncomeCagr > 0.12,
+            growthRate: formatRate(summary.eps_cagr) && `EPS ${formatRate(summary.eps_cagr)}`,
+            trendData: trendData('net_income')
         },
         {
             title: 'Revenue Growth 5Y',
-            value: data.analysis.growth_metrics.revenue_growth,
+            value: revenueCagr,
             preference: 'Above 4%',
             isPercent: true,
-            good: data.analysis.growth_metrics.revenue_growth && data.analysis.growth_metrics.revenue_growth > 0.04,
-            growthRate: '4%',
-            trendData: generateTrendData((data.analysis.growth_metrics.revenue_growth || 0.05) * 1000, 0.04)
+            good: revenueCagr !== null && revenueCagr !== undefined && revenueCagr > 0.04,
+            growthRate: formatRate(revenueCagr),
+            trendData: trendData('revenue')
         },
         {
             title: 'Shares Outstanding',
-            value: data.analysis.market_data.avg_volume,
+            value: summary.latest_shares_outstanding,
             preference: 'Decline',
-            isCurrency: true,
-            good: true,
-            growthRate: '-11.89%',
-            trendData: generateTrendData(100, -0.12)
+            isCount: true,
+            good: sharesCagr !== null && sharesCagr !== undefined && sharesCagr < 0,
+            growthRate: formatRate(sharesCagr),
+            trendData: trendData('shares_outstanding')
         }
     ];
 
@@ -317,6 +344,8 @@ function displayPillars(data) {
                 formattedValue = (pillar.value * 100).toFixed(2) + '%';
             } else if (pillar.isCurrency) {
                 formattedValue = formatCurrency(pillar.value);
+            } else if (pillar.isCount) {
+                formattedValue = formatLargeNumber(pillar.value);
             } else {
                 formattedValue = pillar.value.toFixed(2);
             }
@@ -341,44 +370,61 @@ function displayPillars(data) {
 
         pillarsGrid.appendChild(card);
 
-        // Create mini chart
-        setTimeout(() => {
-            const ctx = document.getElementById(chartId);
-            if (ctx) {
-                new Chart(ctx.getContext('2d'), {
-                    type: 'bar',
-                    data: {
-                        labels: Array(pillar.trendData.length).fill(''),
-                        datasets: [{
-                            data: pillar.trendData,
-                            backgroundColor: pillar.good ? '#10b981' : '#ef4444',
-                            barPercentage: 0.9,
-                            categoryPercentage: 0.95
-                        }]
-                    },
-                    options: {
-                        responsive: true,
-                        maintainAspectRatio: false,
-                        plugins: {
-                            legend: { display: false },
-                            tooltip: { enabled: false }
-                        },
-                        scales: {
-                            x: { display: false },
-                            y: { display: false }
-                        }
-                    }
-                });
-            }
-        }, 100);
+        // Mini charts are created when the pillars tab is visible
+        pendingPillarCharts.push({ chartId, pillar });
     });
 
+    renderPillarCharts();
+
     document.getElementById('pillarScore').textContent = `${goodCount}/8`;
 
     // Display metrics summary
     displayMetricsSummary(data);
 }
 
+function renderPillarCharts() {
+    // Hidden tabs have no layout, so their charts wait until the tab is shown
+    if (!document.getElementById('pillarsTab').classList.contains('active') || pendingPillarCharts.length === 0) {
+        return;
+    }
+
+    const charts = pendingPillarCharts;
+    pendingPillarCharts = [];
+
+    requestAnimationFrame(() => {
+        charts.forEach(({ chartId, pillar }) => {
+            const ctx = document.getElementById(chartId);
+            if (!ctx) {
+                return;
+            }
+            pillarCharts.push(new Chart(ctx.getContext('2d'), {
+                type: 'bar',
+                data: {
+                    labels: Array(pillar.trendData.length).fill(''),
+                    datasets: [{
+                        data: pillar.trendData,
+                        backgroundColor: pillar.good ? '#10b981' : '#ef4444',
+                        barPercentage: 0.9,
+                        categoryPercentage: 0.95
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {
+                        legend: { display: false },
+                        tooltip: { enabled: false }
+                    },
+                    scales: {
+                        x: { display: false },
+                        y: { display: false }
+                    }
+                }
+            }));
+        });
+    });
+}
+
 function displayMetricsSummary(data) {
     // Valuation Summary
     const valuationSummary = document.getElementById('valuationSummary');
@@ -682,7 +728,8 @@ function displayPriceChart(historicalData) {
     // Update chart title with ticker
     const chartTitle = document.getElementById('chartTitle');
     if (chartTitle && historicalData.ticker) {
-        chartTitle.textContent = `${historicalData.ticker} - Price History (1 Year)`;
+        const rangeLabel = CHART_RANGE_LABELS[historicalData.range] || CHART_RANGE_LABELS['1y'];
+        chartTitle.textContent = `${historicalData.ticker} - Price History (${rangeLabel})`;
     }
 
     if (priceChart) {
@@ -847,9 +894,15 @@ function displayPriceChart(historicalData) {
         }
     });
 
+    // Remove old signal info if exists
+    const chartSection = document.querySelector('.chart-section .content-container');
+    const oldSignalInfo = chartSection.querySelector('.signal-info');
+    if (oldSignalInfo) {
+        oldSignalInfo.remove();
+    }
+
     // Display cross signal info below chart
     if (historicalData.cross_signals && historicalData.cross_signals.length > 0) {
-        const chartSection = document.querySelector('.chart-section .content-container');
         let signalInfo = '<div style="margin-top: 20px; padding: 16px; background: #f9fafb; border-radius: 8px; border-left: 4px solid #3b82f6;">';
         signalInfo += '<h3 style="font-size: 1rem; font-weight: 600; margin-bottom: 12px; color: #111827;">📊 Cross Signals Detected</h3>';
 
@@ -867,12 +920,6 @@ function displayPriceChart(historicalData) {
 
         signalInfo += '</div>';
 
-        // Remove old signal info if exists
-        const oldSignalInfo = chartSection.querySelector('.signal-info');
-        if (oldSignalInfo) {
-            oldSignalInfo.remove();
-        }
-
         const signalDiv = document.createElement('div');
         signalDiv.className = 'signal-info';
         signalDiv.innerHTML = signalInfo;
@@ -880,6 +927,37 @@ function displayPriceChart(historicalData) {
     }
 }
 
+async function changeChartRange(range) {
+    document.querySelectorAll('.range-btn').forEach(btn => {
+        btn.classList.toggle('active', btn.dataset.range === range);
+    });
+    currentChartRange = range;
+
+    if (!currentData) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/history', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ ticker: currentData.ticker, range: range })
+        });
+
+        const data = await response.json();
+
+        // Ignore responses for a range the user has already moved away from
+        if (data.success && range === currentChartRange) {
+            currentData.historical_data = data.historical_data;
+            displayPriceChart(data.historical_data);
+        }
+    } catch (error) {
+        console.error('Error loading price history:', error);
+    }
+}
+
 function switchMainTab(tabName) {
     // Update active tab button
     document.querySelectorAll('.main-tab').forEach(btn => {
@@ -902,6 +980,11 @@ function switchMainTab(tabName) {
 
     document.getElementById(tabMap[tabName]).classList.add('active');
 
+    // Draw pillar charts deferred while their tab was hidden
+    if (tabName === 'pillars') {
+        renderPillarCharts();
+    }
+
     // Load AI insights when tab is clicked
     if (tabName === 'ai-insights' && currentData) {
         loadAIInsights(currentData);
@@ -1079,7 +1162,8 @@ async function downloadPDF() {
             body: JSON.stringify({
                 ticker: currentData.ticker,
                 analysis: currentData.analysis,
-                financial_statements: currentData.financial_statements
+                financial_statements: currentData.financial_statements,
+                trends: currentData.trends
             })
         });
 
@@ -14,212 +14,25 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 import io
+from fundamentals import cache, get_fundamental_data, get_historical_data, parse_chart_params
+from profiling import init_profiling
+from assets import init_assets
 
 app = Flask(__name__)
 app.json.sort_keys = False
 
-# Initialize OpenAI client (requires OPENAI_API_KEY environment variable)
-client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY', 'your-api-key-here'))
+# Opt-in request profiling; registers nothing unless PROFILING_TOKEN is set
+init_profiling(app)
 
-def clean_value(value):
-    """Convert NaN, inf, and other non-JSON-serializable values to None"""
-    if value is None:
-        return None
-    if isinstance(value, (float, np.floating)):
-        if math.isnan(value) or math.isinf(value):
-            return None
-    if isinstance(value, np.integer):
-        return int(value)
-    return value
-
-def clean_dict(d):
-    """Recursively clean dictionary of NaN values"""
-    if isinstance(d, dict):
-        return {k: clean_dict(v) for k, v in d.items()}
-    elif isinstance(d, list):
-        return [clean_dict(item) for item in d]
-    elif isinstance(d, (float, np.floating)):
-        if math.isnan(d) or math.isinf(d):
-            return None
-        return d
-    elif isinstance(d, np.integer):
-        return int(d)
-    else:
-        return d
-
-def get_fundamental_data(ticker_symbol):
-    """
-    Fetch comprehensive fundamental analysis data for a given stock ticker
-    """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-
-        # Get basic info
-        info = ticker.info
-
-        # Get financial statements
-        income_stmt = ticker.income_stmt
-        balance_sheet = ticker.balance_sheet
-        cash_flow = ticker.cash_flow
-
-        # Get quarterly data
-        quarterly_income = ticker.quarterly_income_stmt
-        quarterly_balance = ticker.quarterly_balance_sheet
-        quarterly_cashflow = ticker.quarterly_cash_flow
-
-        # Calculate key ratios and metrics
-        analysis = {
-            'company_info': {
-                'name': info.get('longName', 'N/A'),
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'country': info.get('country', 'N/A'),
-                'website': info.get('website', 'N/A'),
-                'description': info.get('longBusinessSummary', 'N/A'),
-                'employees': clean_value(info.get('fullTimeEmployees', 'N/A')),
-            },
-            'market_data': {
-                'current_price': clean_value(info.get('currentPrice', 0)),
-                'market_cap': clean_value(info.get('marketCap', 0)),
-                'enterprise_value': clean_value(info.get('enterpriseValue', 0)),
-                '52_week_high': clean_value(info.get('fiftyTwoWeekHigh', 0)),
-                '52_week_low': clean_value(info.get('fiftyTwoWeekLow', 0)),
-                'beta': clean_value(info.get('beta', 0)),
-                'avg_volume': clean_value(info.get('averageVolume', 0)),
-            },
-            'valuation_ratios': {
-                'pe_ratio': clean_value(info.get('trailingPE', 0)),
-                'forward_pe': clean_value(info.get('forwardPE', 0)),
-                'peg_ratio': clean_value(info.get('pegRatio', 0)),
-                'price_to_book': clean_value(info.get('priceToBook', 0)),
-                'price_to_sales': clean_value(info.get('priceToSalesTrailing12Months', 0)),
-                'ev_to_revenue': clean_value(info.get('enterpriseToRevenue', 0)),
-                'ev_to_ebitda': clean_value(info.get('enterpriseToEbitda', 0)),
-            },
-            'profitability_ratios': {
-                'profit_margin': clean_value(info.get('profitMargins', 0)),
-                'operating_margin': clean_value(info.get('operatingMargins', 0)),
-                'gross_margin': clean_value(info.get('grossMargins', 0)),
-                'roe': clean_value(info.get('returnOnEquity', 0)),
-                'roa': clean_value(info.get('returnOnAssets', 0)),
-                'roic': clean_value(info.get('returnOnCapital', 0)),
-            },
-            'financial_health': {
-                'current_ratio': clean_value(info.get('currentRatio', 0)),
-                'quick_ratio': clean_value(info.get('quickRatio', 0)),
-                'debt_to_equity': clean_value(info.get('debtToEquity', 0)),
-                'total_debt': clean_value(info.get('totalDebt', 0)),
-                'total_cash': clean_value(info.get('totalCash', 0)),
-                'free_cash_flow': clean_value(info.get('freeCashflow', 0)),
-                'operating_cash_flow': clean_value(info.get('operatingCashflow', 0)),
-            },
-            'growth_metrics': {
-                'revenue_growth': clean_value(info.get('revenueGrowth', 0)),
-                'earnings_growth': clean_value(info.get('earningsGrowth', 0)),
-                'revenue_per_share': clean_value(info.get('revenuePerShare', 0)),
-                'eps_trailing': clean_value(info.get('trailingEps', 0)),
-                'eps_forward': clean_value(info.get('forwardEps', 0)),
-            },
-            'dividend_info': {
-                'dividend_rate': clean_value(info.get('dividendRate', 0)),
-                'dividend_yield': clean_value(info.get('dividendYield', 0)),
-                'payout_ratio': clean_value(info.get('payoutRatio', 0)),
-                'ex_dividend_date': info.get('exDividendDate', 'N/A'),
-            },
-            'analyst_recommendations': {
-                'target_high_price': clean_value(info.get('targetHighPrice', 0)),
-                'target_low_price': clean_value(info.get('targetLowPrice', 0)),
-                'target_mean_price': clean_value(info.get('targetMeanPrice', 0)),
-                'target_median_price': clean_value(info.get('targetMedianPrice', 0)),
-                'recommendation': info.get('recommendationKey', 'N/A'),
-                'number_of_analyst_opinions': clean_value(info.get('numberOfAnalystOpinions', 0)),
-            }
-        }
-
-        # Convert financial statements to JSON-serializable format
-        def df_to_dict(df):
-            if df is not None and not df.empty:
-                # Convert to dict and handle datetime indices and NaN values
-                df_copy = df.copy()
-                # Convert column names (dates) to strings
-                df_copy.columns = df_copy.columns.astype(str)
-                # Replace NaN with None for JSON serialization
-                df_copy = df_copy.where(pd.notnull(df_copy), None)
-                # Transpose so rows are metrics and columns are dates
-                # This makes the structure: {metric_name: {date1: value1, date2: value2}}
-                transposed = df_copy.T.to_dict()
-                return transposed
-            return {}
-
-        financial_statements = {
-            'income_statement': df_to_dict(income_stmt),
-            'balance_sheet': df_to_dict(balance_sheet),
-            'cash_flow': df_to_dict(cash_flow),
-            'quarterly_income': df_to_dict(quarterly_income),
-            'quarterly_balance': df_to_dict(quarterly_balance),
-            'quarterly_cashflow': df_to_dict(quarterly_cashflow),
-        }
-
-        # Get historical data for charts (need 2 years for proper 200-day MA calculation)
-        hist_full = ticker.history(period="2y")
-
-        # Calculate moving averages on full dataset
-        ma_50_full = hist_full['Close'].rolling(window=50).mean()
-        ma_200_full = hist_full['Close'].rolling(window=200).mean()
-
-        # Detect golden/death cross in the last year only
-        cross_signals = []
-        one_year_ago_idx = len(hist_full) - 252 if len(hist_full) > 252 else 0  # ~252 trading days in a year
-
-        for i in range(max(one_year_ago_idx, 1), len(hist_full)):
-            if pd.notnull(ma_50_full.iloc[i]) and pd.notnull(ma_200_full.iloc[i]) and pd.notnull(ma_50_full.iloc[i-1]) and pd.notnull(ma_200_full.iloc[i-1]):
-                # Golden Cross: 50-day crosses above 200-day
-                if ma_50_full.iloc[i-1] <= ma_200_full.iloc[i-1] and ma_50_full.iloc[i] > ma_200_full.iloc[i]:
-                    cross_signals.append({
-                        'type': 'golden',
-                        'date': hist_full.index[i].strftime('%Y-%m-%d'),
-                        'price': float(hist_full['Close'].iloc[i])
-                    })
-                # Death Cross: 50-day crosses below 200-day
-                elif ma_50_full.iloc[i-1] >= ma_200_full.iloc[i-1] and ma_50_full.iloc[i] < ma_200_full.iloc[i]:
-                    cross_signals.append({
-                        'type': 'death',
-                        'date': hist_full.index[i].strftime('%Y-%m-%d'),
-                        'price': float(hist_full['Close'].iloc[i])
-                    })
-
-        # Only return last year of data for display
-        hist = hist_full.tail(252) if len(hist_full) > 252 else hist_full
-        ma_50 = ma_50_full.tail(252) if len(ma_50_full) > 252 else ma_50_full
-        ma_200 = ma_200_full.tail(252) if len(ma_200_full) > 252 else ma_200_full
-
-        historical_data = {
-            'dates': hist.index.strftime('%Y-%m-%d').tolist(),
-            'close': hist['Close'].tolist(),
-            'volume': hist['Volume'].tolist(),
-            'ma_50': ma_50.tolist(),
-            'ma_200': ma_200.tolist(),
-            'cross_signals': cross_signals,
-            'ticker': ticker_symbol.upper()
-        }
-
-        result = {
-            'success': True,
-            'ticker': ticker_symbol.upper(),
-            'analysis': analysis,
-            'financial_statements': financial_statements,
-            'historical_data': historical_data,
-        }
+# Minified, content-hashed, precompressed front-end assets (see assets.py)
+init_assets(app)
 
-        # Clean all NaN values before returning
-        return clean_dict(result)
+# Cache lifetimes in seconds (see fundamentals.py for the analysis caches)
+MARKET_MOVERS_TTL = int(os.environ.get('MARKET_MOVERS_CACHE_TTL', 5 * 60))
+STOCK_NEWS_TTL = int(os.environ.get('STOCK_NEWS_CACHE_TTL', 10 * 60))
 
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'ticker': ticker_symbol.upper()
-        }
+# Initialize OpenAI client (requires OPENAI_API_KEY environment variable)
+client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY', 'your-api-key-here'))
 
 @app.route('/')
 def index():
@@ -235,7 +48,27 @@ def analyze():
     if not ticker:
         return jsonify({'success': False, 'error': 'Please provide a ticker symbol'}), 400
 
-    result = get_fundamental_data(ticker)
+    chart_range, interval, points, error = parse_chart_params(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    result = get_fundamental_data(ticker, chart_range, interval, points)
+    return jsonify(result)
+
+@app.route('/api/history', methods=['POST'])
+def history():
+    """API endpoint to get chart data for a ticker over a given range and interval"""
+    data = request.get_json()
+    ticker = data.get('ticker', '').strip().upper()
+
+    if not ticker:
+        return jsonify({'success': False, 'error': 'Please provide a ticker symbol'}), 400
+
+    chart_range, interval, points, error = parse_chart_params(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    result = get_historical_data(ticker, chart_range, interval, points)
     return jsonify(result)
 
 @app.route('/api/compare', methods=['POST'])
@@ -255,54 +88,63 @@ def compare():
 
     return jsonify({'success': True, 'data': comparison_data})
 
+def fetch_market_movers():
+    """Fetch top gainers and losers from a sample of popular tickers"""
+    # Use popular tickers as sample (in production, you'd fetch from a real-time API)
+    sample_tickers = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'AMD',
+                     'NFLX', 'DIS', 'BA', 'GE', 'GM', 'F', 'INTC', 'CSCO', 'ORCL', 'IBM']
+
+    movers = []
+    for ticker_symbol in sample_tickers:
+        try:
+            ticker = yf.Ticker(ticker_symbol)
+            info = ticker.info
+            hist = ticker.history(period='7d')
+
+            if len(hist) >= 2:
+                current_price = hist['Close'].iloc[-1]
+                prev_price = hist['Close'].iloc[-2]
+                change = current_price - prev_price
+                change_percent = (change / prev_price) * 100
+
+                # Get sparkline data (last 7 days)
+                sparkline_data = hist['Close'].tolist()
+
+                movers.append({
+                    'symbol': ticker_symbol,
+                    'name': info.get('longName', ticker_symbol),
+                    'price': float(current_price),
+                    'change': float(change),
+                    'change_percent': float(change_percent),
+                    'sparkline': sparkline_data
+                })
+        except:
+            continue
+
+    # Sort by change percentage
+    movers.sort(key=lambda x: x['change_percent'], reverse=True)
+
+    # Get top 10 gainers and losers
+    gainers = movers[:10]
+    losers = movers[-10:]
+    losers.reverse()
+
+    return {
+        'success': True,
+        'gainers': gainers,
+        'losers': losers
+    }
+
 @app.route('/api/market-movers', methods=['GET'])
 def market_movers():
     """API endpoint to get top gainers and losers"""
     try:
-        # Use popular tickers as sample (in production, you'd fetch from a real-time API)
-        sample_tickers = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'AMD',
-                         'NFLX', 'DIS', 'BA', 'GE', 'GM', 'F', 'INTC', 'CSCO', 'ORCL', 'IBM']
-
-        movers = []
-        for ticker_symbol in sample_tickers:
-            try:
-                ticker = yf.Ticker(ticker_symbol)
-                info = ticker.info
-                hist = ticker.history(period='7d')
-
-                if len(hist) >= 2:
-                    current_price = hist['Close'].iloc[-1]
-                    prev_price = hist['Close'].iloc[-2]
-                    change = current_price - prev_price
-                    change_percent = (change / prev_price) * 100
-
-                    # Get sparkline data (last 7 days)
-                    sparkline_data = hist['Close'].tolist()
-
-                    movers.append({
-                        'symbol': ticker_symbol,
-                        'name': info.get('longName', ticker_symbol),
-                        'price': float(current_price),
-                        'change': float(change),
-                        'change_percent': float(change_percent),
-                        'sparkline': sparkline_data
-                    })
-            except:
-                continue
-
-        # Sort by change percentage
-        movers.sort(key=lambda x: x['change_percent'], reverse=True)
-
-        # Get top 10 gainers and losers
-        gainers = movers[:10]
-        losers = movers[-10:]
-        losers.reverse()
-
-        return jsonify({
-            'success': True,
-            'gainers': gainers,
-            'losers': losers
-        })
+        return jsonify(cache.get_or_set(
+            'market_movers',
+            MARKET_MOVERS_TTL,
+            fetch_market_movers,
+            should_cache=lambda result: result['gainers'] or result['losers']
+        ))
 
     except Exception as e:
         return jsonify({
@@ -339,78 +181,86 @@ def market_news():
             'error': str(e)
         }), 500
 
+def fetch_stock_news(ticker):
+    """Fetch and format the most recent news items for a ticker"""
+    stock = yf.Ticker(ticker)
+    news_data = stock.news
+
+    # Format news data for display
+    formatted_news = []
+    for item in news_data[:10]:  # Limit to 10 most recent news items
+        # News data is nested under 'content' key
+        content = item.get('content', {})
+
+        # Get title
+        title = content.get('title', 'No title')
+
+        # Get publisher
+        provider = content.get('provider', {})
+        publisher = provider.get('displayName', 'Unknown')
+
+        # Get link
+        click_through = content.get('clickThroughUrl', {})
+        link = click_through.get('url', '#')
+
+        # Get published date
+        pub_date = content.get('pubDate', '')
+        if pub_date:
+            try:
+                # Parse ISO format datetime
+                from dateutil import parser
+                dt = parser.parse(pub_date)
+                published = dt.strftime('%B %d, %Y %I:%M %p')
+            except:
+                published = pub_date
+        else:
+            published = 'Unknown date'
+
+        # Get thumbnail
+        thumbnail_data = content.get('thumbnail', None)
+        thumbnail = ''
+        if thumbnail_data:
+            # Thumbnail can be a string or an object
+            if isinstance(thumbnail_data, str):
+                thumbnail = thumbnail_data
+            elif isinstance(thumbnail_data, dict):
+                # Get first resolution URL
+                resolutions = thumbnail_data.get('resolutions', [])
+                if resolutions and len(resolutions) > 0:
+                    thumbnail = resolutions[0].get('url', '')
+
+        # If still no thumbnail, try thumbnails array
+        if not thumbnail:
+            thumbnails = content.get('thumbnails', [])
+            if thumbnails and len(thumbnails) > 0:
+                if isinstance(thumbnails[0], str):
+                    thumbnail = thumbnails[0]
+                elif isinstance(thumbnails[0], dict):
+                    thumbnail = thumbnails[0].get('url', '')
+
+        formatted_news.append({
+            'title': title,
+            'publisher': publisher,
+            'link': link,
+            'published': published,
+            'thumbnail': thumbnail or ''
+        })
+
+    return {
+        'success': True,
+        'ticker': ticker.upper(),
+        'news': formatted_news
+    }
+
 @app.route('/api/stock-news/<ticker>', methods=['GET'])
 def stock_news(ticker):
     """API endpoint to get stock-specific news"""
     try:
-        stock = yf.Ticker(ticker)
-        news_data = stock.news
-
-        # Format news data for display
-        formatted_news = []
-        for item in news_data[:10]:  # Limit to 10 most recent news items
-            # News data is nested under 'content' key
-            content = item.get('content', {})
-
-            # Get title
-            title = content.get('title', 'No title')
-
-            # Get publisher
-            provider = content.get('provider', {})
-            publisher = provider.get('displayName', 'Unknown')
-
-            # Get link
-            click_through = content.get('clickThroughUrl', {})
-            link = click_through.get('url', '#')
-
-            # Get published date
-            pub_date = content.get('pubDate', '')
-            if pub_date:
-                try:
-                    # Parse ISO format datetime
-                    from dateutil import parser
-                    dt = parser.parse(pub_date)
-                    published = dt.strftime('%B %d, %Y %I:%M %p')
-                except:
-                    published = pub_date
-            else:
-                published = 'Unknown date'
-
-            # Get thumbnail
-            thumbnail_data = content.get('thumbnail', None)
-            thumbnail = ''
-            if thumbnail_data:
-                # Thumbnail can be a string or an object
-                if isinstance(thumbnail_data, str):
-                    thumbnail = thumbnail_data
-                elif isinstance(thumbnail_data, dict):
-                    # Get first resolution URL
-                    resolutions = thumbnail_data.get('resolutions', [])
-                    if resolutions and len(resolutions) > 0:
-                        thumbnail = resolutions[0].get('url', '')
-
-            # If still no thumbnail, try thumbnails array
-            if not thumbnail:
-                thumbnails = content.get('thumbnails', [])
-                if thumbnails and len(thumbnails) > 0:
-                    if isinstance(thumbnails[0], str):
-                        thumbnail = thumbnails[0]
-                    elif isinstance(thumbnails[0], dict):
-                        thumbnail = thumbnails[0].get('url', '')
-
-            formatted_news.append({
-                'title': title,
-                'publisher': publisher,
-                'link': link,
-                'published': published,
-                'thumbnail': thumbnail or ''
-            })
-
-        return jsonify({
-            'success': True,
-            'ticker': ticker.upper(),
-            'news': formatted_news
-        })
+        return jsonify(cache.get_or_set(
+            f"stock_news:{ticker.upper()}",
+            STOCK_NEWS_TTL,
+            lambda: fetch_stock_news(ticker)
+        ))
 
     except Exception as e:
         return jsonify({
@@ -520,6 +370,7 @@ def generate_pdf():
         ticker = data.get('ticker', '')
         analysis = data.get('analysis', {})
         financial_statements = data.get('financial_statements', {})
+        trends = (data.get('trends') or {}).get('summary', {})
 
         if not ticker or not analysis:
             return jsonify({'success': False, 'error': 'Missing data'}), 400
@@ -734,16 +585,28 @@ def generate_pdf():
         story.append(Paragraph("Key metrics to evaluate stock strength", normal_style))
         story.append(Spacer(1, 0.2*inch))
 
+        # Multi-year values come from the statement-derived trends; a ticker without
+        # usable statements shows N/A rather than point-in-time figures
+        avg_pe = trends.get('avg_pe_ratio')
+        avg_price_to_fcf = trends.get('avg_price_to_fcf')
+        avg_roic = trends.get('avg_roic')
+        ltl_to_fcf = trends.get('ltl_to_avg_fcf')
+        fcf_cagr = trends.get('fcf_cagr')
+        earnings_cagr = trends.get('net_income_cagr')
+        revenue_cagr = trends.get('revenue_cagr')
+        shares = trends.get('latest_shares_outstanding')
+        shares_cagr = trends.get('shares_cagr')
+
         commandments_data = [
             ['Metric', 'Value', 'Preference', 'Status'],
-            ['5Y P/E Ratio', f"{valuation.get('pe_ratio', 0):.2f}" if valuation.get('pe_ratio') else 'N/A', 'Below 22.5', '✓' if valuation.get('pe_ratio') and valuation.get('pe_ratio') < 22.5 else '✗'],
-            ['5Y Price/FCF', f"{valuation.get('forward_pe', 0):.2f}" if valuation.get('forward_pe') else 'N/A', 'Below 22.5', '✓' if valuation.get('forward_pe') and valuation.get('forward_pe') < 22.5 else '✗'],
-            ['5Y ROIC', f"{profitability.get('roic', 0)*100:.2f}%" if profitability.get('roic') else 'N/A', 'Above 9%', '✓' if profitability.get('roic') and profitability.get('roic') > 0.09 else '✗'],
-            ['Debt Ratio', f"{health.get('debt_to_equity', 0):.2f}" if health.get('debt_to_equity') else 'N/A', 'Below 5', '✓' if health.get('debt_to_equity') and health.get('debt_to_equity') < 5 else '✗'],
-            ['FCF Growth', f"${health.get('free_cash_flow', 0)/1e9:.2f}B" if health.get('free_cash_flow') else 'N/A', 'Above 9%', '✓' if health.get('free_cash_flow') and health.get('free_cash_flow') > 0 else '✗'],
-            ['Earnings Growth', f"{growth.get('earnings_growth', 0)*100:.2f}%" if growth.get('earnings_growth') else 'N/A', 'Above 12%', '✓' if growth.get('earnings_growth') and growth.get('earnings_growth') > 0.12 else '✗'],
-            ['Revenue Growth', f"{growth.get('revenue_growth', 0)*100:.2f}%" if growth.get('revenue_growth') else 'N/A', 'Above 4%', '✓' if growth.get('revenue_growth') and growth.get('revenue_growth') > 0.04 else '✗'],
-            ['Shares Outstanding', f"{market_data.get('avg_volume', 0)/1e6:.2f}M" if market_data.get('avg_volume') else 'N/A', 'Decline', '✓'],
+            ['5Y P/E Ratio', f"{avg_pe:.2f}" if avg_pe else 'N/A', 'Below 22.5', '✓' if avg_pe and avg_pe < 22.5 else '✗'],
+            ['5Y Price/FCF', f"{avg_price_to_fcf:.2f}" if avg_price_to_fcf else 'N/A', 'Below 22.5', '✓' if avg_price_to_fcf and avg_price_to_fcf < 22.5 else '✗'],
+            ['5Y ROIC', f"{avg_roic*100:.2f}%" if avg_roic is not None else 'N/A', 'Above 9%', '✓' if avg_roic is not None and avg_roic > 0.09 else '✗'],
+            ['LTL / 5Y FCF', f"{ltl_to_fcf:.2f}" if ltl_to_fcf is not None else 'N/A', 'Below 5', '✓' if ltl_to_fcf is not None and ltl_to_fcf < 5 else '✗'],
+            ['FCF Growth', f"{fcf_cagr*100:.2f}%" if fcf_cagr is not None else 'N/A', 'Above 9%', '✓' if fcf_cagr is not None and fcf_cagr > 0.09 else '✗'],
+            ['Earnings Growth', f"{earnings_cagr*100:.2f}%" if earnings_cagr is not None else 'N/A', 'Above 12%', '✓' if earnings_cagr is not None and earnings_cagr > 0.12 else '✗'],
+            ['Revenue Growth', f"{revenue_cagr*100:.2f}%" if revenue_cagr is not None else 'N/A', 'Above 4%', '✓' if revenue_cagr is not None and revenue_cagr > 0.04 else '✗'],
+            ['Shares Outstanding', f"{shares/1e6:.2f}M" if shares else 'N/A', 'Decline', '✓' if shares_cagr is not None and shares_cagr < 0 else '✗'],
         ]
         commandments_table = Table(commandments_data, colWidths=[1.8*inch, 1.5*inch, 1.5*inch, 1*inch])
         commandments_table.setStyle(TableStyle([
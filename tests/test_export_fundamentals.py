@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+import export_fundamentals
+
+
+def fundamentals_row(ticker, employees, ex_dividend_date, name):
+    return {
+        'ticker': ticker,
+        'company_info.name': name,
+        'company_info.employees': employees,
+        'dividend_info.ex_dividend_date': ex_dividend_date,
+        'valuation_ratios.pe_ratio': None,
+    }
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'csv'])
+def test_parts_read_back_as_one_dataset(tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+
+    # A regular company in one part, and an ETF with 'N/A' placeholders (and no trends) in the next
+    export_fundamentals.write_part(str(tmp_path), 'part-00001', {
+        'fundamentals': [fundamentals_row('AAPL', 150000, 1715299200, 'Apple Inc.')],
+        'statements': [{'ticker': 'AAPL', 'statement': 'income_statement', 'metric': 'Total Revenue',
+                        'period': '2024-09-28', 'value': 391035000000}],
+        'history': [{'ticker': 'AAPL', 'date': '2024-10-18', 'close': 235.0, 'volume': 46431500,
+                     'ma_50': None, 'ma_200': None}],
+    }, file_format)
+    export_fundamentals.write_part(str(tmp_path), 'part-00002', {
+        'fundamentals': [fundamentals_row('SPY', 'N/A', 'N/A', 'N/A')],
+        'statements': [],
+        'history': [{'ticker': 'SPY', 'date': '2024-10-18', 'close': 584.59, 'volume': 37416800,
+                     'ma_50': 570.1, 'ma_200': 530.2}],
+    }, file_format)
+
+    if file_format == 'parquet':
+        df = pd.read_parquet(tmp_path / 'fundamentals')
+    else:
+        df = pd.concat(pd.read_csv(path) for path in sorted((tmp_path / 'fundamentals').iterdir()))
+    df = df.set_index('ticker')
+
+    assert list(df.columns) == list(export_fundamentals.DATASET_COLUMNS['fundamentals'][1:])
+    assert df.loc['AAPL', 'company_info.employees'] == 150000
+    assert pd.isna(df.loc['SPY', 'company_info.employees'])
+    assert pd.isna(df.loc['SPY', 'dividend_info.ex_dividend_date'])
+    assert pd.isna(df.loc['SPY', 'company_info.name'])
+    assert pd.isna(df.loc['SPY', 'trends.avg_pe_ratio'])
+
+    if file_format == 'parquet':
+        history = pd.read_parquet(tmp_path / 'history')
+        assert sorted(history['ticker']) == ['AAPL', 'SPY']
+        assert history['ma_50'].dtype == 'float64'